@@ -1,8 +1,20 @@
+import atexit
 import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from semantic_cache import config
+from semantic_cache.embedding import generate_embedding as _generate_embedding
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=4096)
+def _hash_query(query):
+    # BLAKE2b is not cryptographically required here, just fast; a 128-bit digest keeps keys short.
+    return hashlib.blake2b(query.encode('utf-8'), digest_size=16).hexdigest()
+
 class CacheManager:
     """
     CacheManager handles multi-tier caching using a session (in-memory) cache,
@@ -12,7 +24,8 @@ class CacheManager:
     search in the vector store if an exact match is not found.
     """
 
-    def __init__(self, persistent_cache, session_cache, vector_store):
+    def __init__(self, persistent_cache, session_cache, vector_store,
+                 similarity_threshold=config.SIMILARITY_THRESHOLD):
         """
         Initialize the CacheManager with the provided cache components.
 
@@ -20,15 +33,33 @@ class CacheManager:
             persistent_cache: An instance of a persistent cache (e.g., Redis)
             session_cache: An instance of an in-memory session cache
             vector_store: An instance of a FAISS-based vector store
+            similarity_threshold (float): Minimum cosine similarity (inner product of
+                normalized embeddings) for a semantic match to count as a hit.
         """
         self.persistent_cache = persistent_cache
         self.session_cache = session_cache
         self.vector_store = vector_store
+        self.similarity_threshold = similarity_threshold
+        self._generate_embedding = _generate_embedding
+        # Embeddings computed on a miss in get(), reused when the caller then calls set().
+        self._emb_cache = OrderedDict()
+        self._emb_cache_size = config.EMBEDDING_MEMO_SIZE
+        self._emb_lock = threading.Lock()
+        # Guards the unsaved-add counter and periodic saves; the vector store locks itself.
+        self._save_lock = threading.Lock()
+        # Keys whose embedding is being computed by a set(), so concurrent sets wait instead.
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # Vectors added since the vector store was last persisted.
+        self._unsaved_adds = 0
+        if vector_store.index_path:
+            atexit.register(self.save_vector_store)
         logger.info("CacheManager initialized with persistent, session, and vector store caches.")
 
     def get_cache_key(self, query):
         """
-        Generate a unique cache key for a given query using SHA256.
+        Generate a unique cache key for a given query using a 128-bit BLAKE2b digest.
+        Recent keys are memoized since a query is typically hashed on both get and set.
 
         Args:
             query (str): The query string.
@@ -36,7 +67,18 @@ class CacheManager:
         Returns:
             str: A hexadecimal string representing the cache key.
         """
-        return hashlib.sha256(query.encode()).hexdigest()
+        return _hash_query(query)
+
+    def _remember_embedding(self, key, embedding):
+        with self._emb_lock:
+            self._emb_cache[key] = embedding
+            self._emb_cache.move_to_end(key)
+            if len(self._emb_cache) > self._emb_cache_size:
+                self._emb_cache.popitem(last=False)
+
+    def _pop_embedding(self, key):
+        with self._emb_lock:
+            return self._emb_cache.pop(key, None)
 
     def get(self, query):
         """
@@ -67,18 +109,26 @@ class CacheManager:
             self.session_cache.set(key, result)
             return result
 
+        # Nothing to match against yet: skip the embedding model entirely.
+        if len(self.vector_store) < config.MIN_SEMANTIC_N:
+            logger.debug(f"No cached result found for query: '{query}'")
+            return None
+
         # Compute embedding and search FAISS for semantically similar entries.
         try:
-            from semantic_cache.embedding import generate_embedding
-            embedding = generate_embedding(query)
+            embedding = self._generate_embedding(query)
         except Exception as e:
             logger.error(f"Error generating embedding for query '{query}': {e}")
             return None
+        self._remember_embedding(key, embedding)
 
         logger.debug("Performing FAISS search for semantically similar entries.")
-        similar_entries = self.vector_store.search(embedding, top_k=1)
-        for sim_key, distance in similar_entries:
-            similar_result = self.persistent_cache.get(sim_key)
+        similar_entries = self.vector_store.search(embedding, top_k=config.SEMANTIC_TOP_K)
+        # Inner product of normalized vectors: higher means more similar.
+        similar_entries = [(sim_key, distance) for sim_key, distance in similar_entries
+                           if distance >= self.similarity_threshold]
+        similar_results = self.persistent_cache.mget([sim_key for sim_key, _ in similar_entries])
+        for (sim_key, distance), similar_result in zip(similar_entries, similar_results):
             if similar_result is not None:
                 logger.debug(f"Found similar cached result for key: {sim_key} (distance: {distance}). Updating session cache.")
                 self.session_cache.set(key, similar_result)
@@ -90,7 +140,8 @@ class CacheManager:
     def set(self, query, value):
         """
         Cache the response for a given query in both the session and persistent caches,
-        and add the query embedding to the vector store.
+        and add the query embedding to the vector store. The embedding is computed
+        outside any lock, once per key even when several threads set the same query.
 
         Args:
             query (str): The query string.
@@ -105,12 +156,31 @@ class CacheManager:
         except Exception as e:
             logger.error(f"Error setting cache for key {key}: {e}")
 
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                if key in self.vector_store:
+                    return  # Same query, same embedding: already indexed.
+                self._inflight[key] = Future()
+        if pending is not None:
+            logger.debug(f"Embedding for key {key} already in progress; waiting for it.")
+            pending.result()
+            return
+
         try:
-            from semantic_cache.embedding import generate_embedding
-            embedding = generate_embedding(query)
+            embedding = self._pop_embedding(key)
+            if embedding is None:
+                embedding = self._generate_embedding(query)
             self.vector_store.add(key, embedding)
+            with self._save_lock:
+                self._unsaved_adds += 1
+                if self._unsaved_adds >= config.INDEX_SAVE_EVERY:
+                    self._save_vector_store_locked()
         except Exception as e:
             logger.error(f"Error adding vector for query '{query}' to vector store: {e}")
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key).set_result(None)
 
     def invalidate(self, query):
         """
@@ -122,8 +192,27 @@ class CacheManager:
         """
         key = self.get_cache_key(query)
         logger.debug(f"Invalidating cache for key: {key} for query: '{query}'")
+        self._pop_embedding(key)
         try:
             self.persistent_cache.delete(key)
             self.session_cache.delete(key)
         except Exception as e:
             logger.error(f"Error invalidating cache for key {key}: {e}")
+
+    def save_vector_store(self):
+        """
+        Persist the vector store to its configured index_path, if any. Called every
+        INDEX_SAVE_EVERY new vectors and at interpreter exit.
+        """
+        with self._save_lock:
+            self._save_vector_store_locked()
+
+    def _save_vector_store_locked(self):
+        path = self.vector_store.index_path
+        if not path or config.INDEX_MMAP:
+            return  # Nothing to persist to, or a read-only mapped replica.
+        try:
+            self.vector_store.save(path)
+            self._unsaved_adds = 0
+        except Exception as e:
+            logger.error(f"Error saving vector store to {path}: {e}")
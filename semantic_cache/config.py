@@ -12,15 +12,71 @@ REDIS_USE_SSL = os.getenv('REDIS_USE_SSL', 'False').lower() in ('true', '1', 'ye
 # Session cache settings
 SESSION_CACHE_MAX_SIZE = int(os.getenv('SESSION_CACHE_MAX_SIZE', 100))
 SESSION_CACHE_TTL = int(os.getenv('SESSION_CACHE_TTL', 300))  # seconds
+SESSION_CACHE_SHARDS = int(os.getenv('SESSION_CACHE_SHARDS', 16))  # independently locked segments
 
 # Vector store settings
-VECTOR_DIM = 768  # typical dimension for SentenceTransformers
-SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', 0.5))  # adjust based on your scale
+VECTOR_DIM = 768  # fallback only; the index uses the loaded model's embedding dimension
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', 0.5))  # minimum cosine similarity for a semantic hit
+# HNSW graph parameters: neighbours per node, and build/search candidate list sizes.
+HNSW_M = int(os.getenv('HNSW_M', 32))
+HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', 100))
+HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', 64))
+# ANN index built once enough vectors are cached; an exact flat index is used until then.
+# The default HNSW graph stores int8 (SQ8) vectors, a quarter of the float32 size. For
+# large caches, "IVF256,PQ32x4fsr,Refine(SQ8)" re-ranks a 4-bit PQ scan against SQ8
+# copies of the vectors at a fraction of the memory; "SQ8" alone gives a flat int8 index.
+# "HNSW32,SQfp16" (or IVF_CODEC=SQfp16) stores float16 vectors, half the float32 size,
+# for when SQ8 loses too much recall; FAISS widens them to float32 with SIMD when scoring.
+INDEX_FACTORY = os.getenv('FAISS_INDEX_FACTORY', f'HNSW{HNSW_M},SQ8')
+# Re-rank RESCORE_K_FACTOR * top_k quantized candidates against float32 copies of the vectors.
+RESCORE = os.getenv('FAISS_RESCORE', 'False').lower() in ('true', '1', 'yes')
+RESCORE_K_FACTOR = int(os.getenv('FAISS_RESCORE_K_FACTOR', 4))
+# "bbq" replaces INDEX_FACTORY with 1-bit codes (random rotation + sign) scanned by Hamming
+# distance: 32x smaller than float32. Pair it with RESCORE for exact final scores.
+QUANTIZER = os.getenv('FAISS_QUANTIZER') or None
+# "hnswlib" builds the ANN index with hnswlib (needs the hnswlib package), whose graph
+# search prefetches neighbour vectors; uses HNSW_M / HNSW_EF_* and ignores INDEX_FACTORY.
+# "ivf" builds IVF<nlist>,<IVF_CODEC> with nlist = max(2 * sqrt(n), 20) for the n cached
+# vectors: much faster to (re)build than HNSW. SQ8 codes take a quarter of the float32
+# memory; combine with RESCORE to re-rank the candidates exactly.
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'faiss')
+IVF_CODEC = os.getenv('IVF_CODEC', 'SQ8')
+# Vectors served by the flat index before the ANN index is built. The default HNSW,SQ8
+# only trains SQ8's per-dimension ranges, which needs few vectors; the threshold is set by
+# exact search, which is cheap up to ~10k vectors (see BRUTE_FORCE_MAX_N). It also gives
+# IVF indexes of up to 256 lists FAISS's recommended 39 training vectors per list.
+INDEX_MIN_TRAIN_SIZE = int(os.getenv('FAISS_INDEX_MIN_TRAIN_SIZE', 256 * 39))
+# IVF lists scanned per query; unset uses min(nlist // 4, 10).
+INDEX_NPROBE = int(os.environ['FAISS_INDEX_NPROBE']) if os.getenv('FAISS_INDEX_NPROBE') else None
+# Rebuild indexes that cannot remove vectors once this fraction of them is deleted.
+TOMBSTONE_REBUILD_RATIO = float(os.getenv('FAISS_TOMBSTONE_REBUILD_RATIO', 0.2))
+FAISS_THREADS = int(os.getenv('FAISS_THREADS', 1))  # OpenMP threads used by FAISS
+BRUTE_FORCE_MAX_N = int(os.getenv('FAISS_BRUTE_FORCE_MAX_N', 10000))  # flat indexes up to this size skip IndexIDMap search
+# Keep the index on CUDA device GPU_DEVICE; needs a GPU build of FAISS.
+USE_GPU = os.getenv('FAISS_USE_GPU', 'False').lower() in ('true', '1', 'yes')
+GPU_DEVICE = int(os.getenv('FAISS_GPU_DEVICE', 0))
+INDEX_PATH = os.getenv('FAISS_INDEX_PATH')  # persist the index here; unset disables persistence
+# Memory-map IVF lists from INDEX_PATH on load instead of reading them into RAM. Mapped
+# lists are read-only, so only enable this for lookup-only replicas of a saved cache.
+INDEX_MMAP = os.getenv('FAISS_INDEX_MMAP', 'False').lower() in ('true', '1', 'yes')
+INDEX_SAVE_EVERY = int(os.getenv('FAISS_INDEX_SAVE_EVERY', 1000))  # save after this many new vectors
+FAISS_WORKER_TIMEOUT = float(os.getenv('FAISS_WORKER_TIMEOUT', 30.0))  # seconds, use_subprocess mode only
+SEMANTIC_TOP_K = int(os.getenv('SEMANTIC_TOP_K', 1))  # similar entries considered per lookup
+VECTOR_ADD_BATCH_SIZE = int(os.getenv('VECTOR_ADD_BATCH_SIZE', 64))  # adds buffered per FAISS call
+MIN_SEMANTIC_N = int(os.getenv('MIN_SEMANTIC_N', 1))  # skip embedding + FAISS below this many cached vectors
 
 # Embedding service settings
 EMBEDDING_MODEL_NAME =  "all-mpnet-base-v2" 
 EMBEDDING_RETRY_COUNT = int(os.getenv('EMBEDDING_RETRY_COUNT', 3))
 EMBEDDING_RETRY_DELAY = float(os.getenv('EMBEDDING_RETRY_DELAY', 1.0))  # seconds
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 32))
+EMBEDDING_BATCH_WAIT = float(os.getenv('EMBEDDING_BATCH_WAIT', 0.005))  # seconds to coalesce queries
+EMBEDDING_TIMEOUT = float(os.getenv('EMBEDDING_TIMEOUT', 30.0))  # seconds
+TORCH_THREADS = int(os.getenv('TORCH_THREADS', 4))
+# Run the model in bfloat16 on CPUs with AVX-512 BF16, or float16 on CUDA.
+EMBEDDING_REDUCED_PRECISION = os.getenv('EMBEDDING_REDUCED_PRECISION', 'True').lower() in ('true', '1', 'yes')
+TOKENIZER_CACHE_SIZE = int(os.getenv('TOKENIZER_CACHE_SIZE', 2048))  # memoized tokenizer outputs
+EMBEDDING_MEMO_SIZE = int(os.getenv('EMBEDDING_MEMO_SIZE', 256))  # missed queries whose embedding is kept for set()
 
 # Logging settings
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
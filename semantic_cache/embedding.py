@@ -1,34 +1,169 @@
 # semantic_cache/embedding.py
 import logging
+import queue
+import threading
 import time
-from typing import Any
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 import numpy as np
 from semantic_cache import config
 
 logger = logging.getLogger(__name__)
 
+def _reduce_precision(model: Any) -> bool:
+    """
+    Cast the model to float16 on CUDA or bfloat16 on CPUs with AVX512-BF16, then run
+    the warmup encode in that precision. Returns False if the hardware has neither.
+    """
+    if model.device.type == "cuda":
+        dtype = torch.float16
+    elif getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)():
+        dtype = torch.bfloat16
+    else:
+        return False
+    model.to(dtype)
+    with torch.inference_mode():
+        model.encode("warmup", show_progress_bar=False)
+    logger.info(f"Embedding model cast to {dtype}.")
+    return True
+
+def _prepare_model(model: Any) -> Any:
+    """
+    Put the model in inference mode, drop to reduced precision where the hardware
+    supports it, and run one dummy encode so the first real query does not pay for
+    kernel selection. If reduced precision fails, the model stays in float32.
+    """
+    torch.set_num_threads(config.TORCH_THREADS)
+    model.eval()
+    warmed_up = False
+    if config.EMBEDDING_REDUCED_PRECISION:
+        try:
+            warmed_up = _reduce_precision(model)
+        except Exception as e:
+            logger.warning(f"Keeping the embedding model in float32: {e}")
+            model.float()
+    if not warmed_up:
+        with torch.inference_mode():
+            model.encode("warmup", show_progress_bar=False)
+    return model
+
 try:
+    import torch
     from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer(config.EMBEDDING_MODEL_NAME)
+    model = _prepare_model(SentenceTransformer(config.EMBEDDING_MODEL_NAME))
     logger.info(f"Loaded SentenceTransformer model: {config.EMBEDDING_MODEL_NAME}")
 except ImportError as e:
     logger.error("SentenceTransformers not installed. Run `pip install sentence-transformers`.")
     model = None
+except Exception as e:
+    logger.error(f"Failed to load SentenceTransformer model {config.EMBEDDING_MODEL_NAME}: {e}")
+    model = None
+
+# Dimension of the vectors generate_embedding returns; sizes the FAISS index.
+EMBEDDING_DIM = model.get_sentence_embedding_dimension() if model is not None else config.VECTOR_DIM
+
+
+class BatchedEmbedder:
+    """
+    Coalesces concurrent embedding requests into a single batched forward pass.
+
+    A background worker takes the first pending query, waits up to `max_wait` seconds
+    for more to arrive (or until `batch_size` are queued), and encodes them together.
+    Tokenizer output is memoized per query string, since cached queries recur, and
+    padded into one batch before running the model directly.
+    """
+
+    def __init__(self, model: Any,
+                 batch_size: int = config.EMBEDDING_BATCH_SIZE,
+                 max_wait: float = config.EMBEDDING_BATCH_WAIT,
+                 tokenizer_cache_size: int = config.TOKENIZER_CACHE_SIZE) -> None:
+        self.model = model
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        # Newer sentence-transformers renamed tokenize() to preprocess().
+        self._preprocess = getattr(model, "preprocess", None) or model.tokenize
+        self._tokenize = lru_cache(maxsize=tokenizer_cache_size)(self._tokenize_uncached)
+        self.queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="BatchedEmbedder", daemon=True)
+        self._worker.start()
+
+    def submit(self, query: str) -> Future:
+        """Queue a query for embedding; the returned future resolves to its vector."""
+        future: Future = Future()
+        self.queue.put((query, future))
+        return future
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _tokenize_uncached(self, query: str) -> Dict[str, Any]:
+        return self._preprocess([query])
+
+    def _collate(self, features: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Pad memoized single-query tokenizer outputs into one batch."""
+        tokenizer = self.model.tokenizer
+        pad_left = getattr(tokenizer, "padding_side", "right") == "left"
+        max_len = max(f["input_ids"].shape[1] for f in features)
+        batch: Dict[str, Any] = {}
+        for name, first in features[0].items():
+            if not isinstance(first, torch.Tensor):
+                batch[name] = first
+                continue
+            pad_value = tokenizer.pad_token_id if name == "input_ids" else 0
+            padded = []
+            for f in features:
+                missing = max_len - f[name].shape[1]
+                padding = (missing, 0) if pad_left else (0, missing)
+                padded.append(torch.nn.functional.pad(f[name], padding, value=pad_value))
+            batch[name] = torch.cat(padded).to(self.model.device)
+        return batch
+
+    def _encode(self, queries: List[str]) -> np.ndarray:
+        features = self._collate([self._tokenize(query) for query in queries])
+        with torch.inference_mode():
+            embeddings = self.model(features)["sentence_embedding"].float()
+            # Normalize in place: one small norms tensor instead of a second batch-sized copy.
+            embeddings.div_(embeddings.norm(dim=1, keepdim=True).clamp_min_(1e-12))
+        return embeddings.cpu().numpy()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                embeddings = self._encode([query for query, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+
+embedder = BatchedEmbedder(model) if model is not None else None
 
 def generate_embedding(query: str) -> np.ndarray:
     """
-    Generate an embedding vector for the given query using SentenceTransformers.
+    Generate an L2-normalized embedding vector for the given query using SentenceTransformers.
+    Queries are batched with concurrent callers through the shared BatchedEmbedder.
     Implements retry logic in case of transient errors.
     """
     attempt = 0
     while attempt < config.EMBEDDING_RETRY_COUNT:
         try:
-            if model is None:
+            if embedder is None:
                 raise RuntimeError("Embedding model unavailable.")
-            embedding = model.encode(query, batch_size=1,show_progress_bar=False, num_workers=0)
-            norm = np.linalg.norm(embedding) or 1.0
-            normalized_embedding = embedding / norm
-            return normalized_embedding.astype('float32')
+            return embedder.submit(query).result(timeout=config.EMBEDDING_TIMEOUT)
         except Exception as e:
             attempt += 1
             logger.error(f"Embedding generation failed on attempt {attempt}/{config.EMBEDDING_RETRY_COUNT}: {e}")
@@ -2,11 +2,36 @@
 import redis
 import pickle
 import logging
-from typing import Any, Optional
+from typing import Any, List, Optional
 from semantic_cache import config
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    logger.warning("orjson not installed; falling back to pickle for persistent cache values.")
+    orjson = None
+
+# Marks values stored as orjson; pickled values (protocol >= 2) always start with b'\x80'.
+_ORJSON_PREFIX = b'o'
+
+def _serialize(value: Any) -> bytes:
+    """Encode with orjson when the value survives a JSON round-trip, else pickle."""
+    if orjson is not None:
+        try:
+            data = orjson.dumps(value)
+            if type(value) is str or orjson.loads(data) == value:
+                return _ORJSON_PREFIX + data
+        except TypeError:
+            pass
+    return pickle.dumps(value)
+
+def _deserialize(raw: bytes) -> Any:
+    if raw[:1] == _ORJSON_PREFIX:
+        return orjson.loads(memoryview(raw)[1:])
+    return pickle.loads(raw)
+
 class PersistentCache:
     def __init__(self,
                  host: str = config.PERSISTENT_CACHE_HOST,
@@ -34,7 +59,7 @@ class PersistentCache:
     def set(self, key: str, value: Any):
         """Store the value in Redis with a TTL."""
         try:
-            serialized_value = pickle.dumps(value)
+            serialized_value = _serialize(value)
             self.client.setex(key, self.ttl, serialized_value)
             logger.debug(f"Set key {key} in persistent cache.")
         except Exception as e:
@@ -46,13 +71,24 @@ class PersistentCache:
             serialized_value = self.client.get(key)
             if serialized_value:
                 logger.debug(f"Cache hit for key {key} in persistent cache.")
-                return pickle.loads(serialized_value)
+                return _deserialize(serialized_value)
             logger.debug(f"Cache miss for key {key} in persistent cache.")
             return None
         except Exception as e:
             logger.exception(f"Error retrieving key {key} from Redis: {e}")
             return None
 
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Retrieve several values in one round-trip; missing or expired keys yield None."""
+        if not keys:
+            return []
+        try:
+            raw_values = self.client.mget(keys)
+            return [_deserialize(raw) if raw else None for raw in raw_values]
+        except Exception as e:
+            logger.exception(f"Error retrieving keys {keys} from Redis: {e}")
+            return [None] * len(keys)
+
     def delete(self, key: str):
         """Remove the key from the cache."""
         try:
@@ -2,34 +2,101 @@ import time
 import threading
 from collections import OrderedDict
 import logging
+from semantic_cache import config
 
 logger = logging.getLogger(__name__)
 
+# Smallest number of entries a shard may hold; below this, per-shard LRU would
+# evict noticeably earlier than a single global LRU.
+MIN_SHARD_SIZE = 64
+
+class _Shard:
+    """One independently locked LRU segment of a SessionCache."""
+    __slots__ = ("cache", "lock", "max_size", "hits", "misses", "evictions", "expirations")
+
+    def __init__(self, max_size):
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
 class SessionCache:
-    def __init__(self, max_size=100, ttl=300):
+    def __init__(self, max_size=100, ttl=300, num_shards=config.SESSION_CACHE_SHARDS):
         """
         In-memory session cache with LRU eviction and TTL expiration.
 
+        Entries are spread over `num_shards` segments, each with its own lock, so
+        threads touching different keys do not serialize on one lock. Caches too
+        small to give every shard MIN_SHARD_SIZE entries use fewer shards.
+
         Args:
             max_size (int): Maximum number of entries in the cache.
             ttl (int): Time-to-live (in seconds) for each cache entry.
+            num_shards (int): Maximum number of independently locked segments.
         """
-        self.cache = OrderedDict()
         self.max_size = max_size
         self.ttl = ttl
-        self.lock = threading.Lock()
-        self.hits = 0  # Count of cache hits
-        self.misses = 0  # Count of cache misses
+        # Expiry uses the monotonic clock in integer nanoseconds: immune to wall-clock
+        # adjustments, and an int comparison in get().
+        self._ttl_ns = int(ttl * 1_000_000_000)
+        self._now = time.monotonic_ns
+        num_shards = max(1, min(num_shards, max_size // MIN_SHARD_SIZE))
+        shard_size = -(-max_size // num_shards)  # ceil division
+        self.shards = [_Shard(shard_size) for _ in range(num_shards)]
+
+    def _shard(self, key):
+        return self.shards[hash(key) % len(self.shards)]
+
+    @property
+    def hits(self):
+        return sum(shard.hits for shard in self.shards)
+
+    @property
+    def misses(self):
+        return sum(shard.misses for shard in self.shards)
+
+    @property
+    def evictions(self):
+        return sum(shard.evictions for shard in self.shards)
+
+    @property
+    def expirations(self):
+        return sum(shard.expirations for shard in self.shards)
+
+    def _expire_head(self, shard, now):
+        """
+        Drop expired entries from the least-recently-used end of `shard`, stopping at
+        the first live one, so expired keys that are never read again are still freed.
+        Called with the shard lock held.
+        """
+        cache = shard.cache
+        while cache:
+            key, (_, expires_at) = next(iter(cache.items()))
+            if now < expires_at:
+                break
+            del cache[key]
+            shard.expirations += 1
+            logger.debug("SessionCache: Swept expired key %s", key)
 
     def set(self, key, value):
         """
         Set a value in the cache under the given key.
-        If the cache exceeds max_size, evict the least-recently-used item.
+        If the key's shard exceeds its size, evict the shard's least-recently-used item.
         """
-        with self.lock:
-            self.cache[key] = (value, time.time())
-            if len(self.cache) > self.max_size:
-                evicted_key, _ = self.cache.popitem(last=False)
+        shard = self._shard(key)
+        with shard.lock:
+            now = self._now()
+            # Reclaim expired entries first, so they go before any live entry is evicted.
+            self._expire_head(shard, now)
+            # Store the absolute expiry so get() needs a single comparison.
+            shard.cache[key] = (value, now + self._ttl_ns)
+            shard.cache.move_to_end(key)
+            if len(shard.cache) > shard.max_size:
+                evicted_key, _ = shard.cache.popitem(last=False)
+                shard.evictions += 1
                 logger.info(f"SessionCache: Evicted key {evicted_key} due to cache size limits.")
             logger.info(f"SessionCache: Set key {key}")
 
@@ -38,32 +105,37 @@ class SessionCache:
         Retrieve the value for a given key if it exists and has not expired.
         Returns None if the key is missing or expired.
         """
-        with self.lock:
-            if key in self.cache:
-                value, timestamp = self.cache[key]
-                if time.time() - timestamp < self.ttl:
-                    self.hits += 1
-                    logger.info(f"SessionCache: Hit for key {key}")
-                    # Refresh the key's position for LRU policy
-                    self.cache.move_to_end(key)
-                    return value
-                else:
-                    self.misses += 1
-                    logger.info(f"SessionCache: Key {key} expired, removing from cache.")
-                    del self.cache[key]
-            else:
-                self.misses += 1
+        shard = self._shard(key)
+        with shard.lock:
+            now = self._now()
+            self._expire_head(shard, now)
+            entry = shard.cache.get(key)
+            if entry is None:
+                shard.misses += 1
                 logger.info(f"SessionCache: Miss for key {key}")
-        return None
+                return None
+            value, expires_at = entry
+            if now >= expires_at:
+                shard.misses += 1
+                shard.expirations += 1
+                logger.info(f"SessionCache: Key {key} expired, removing from cache.")
+                del shard.cache[key]
+                return None
+            shard.hits += 1
+            logger.info(f"SessionCache: Hit for key {key}")
+            # Refresh the key's position for LRU policy
+            shard.cache.move_to_end(key)
+            return value
 
     def delete(self, key):
         """
         Delete the entry associated with the given key from the cache.
         """
-        with self.lock:
-            if key in self.cache:
-                del self.cache[key]
+        shard = self._shard(key)
+        with shard.lock:
+            if shard.cache.pop(key, None) is not None:
                 logger.info(f"SessionCache: Deleted key {key}")
-    
+
     def get_metrics(self):
-        return {"hits": self.hits, "misses": self.misses}
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "expirations": self.expirations}
@@ -1,56 +1,467 @@
+import atexit
 import multiprocessing
+import os
+import pickle
+import threading
+import time
 import numpy as np
-import faiss
 import logging
-import gc
-from typing import Any, List, Tuple
-from multiprocessing.managers import ListProxy  # For type annotations
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Set, Tuple
 from semantic_cache import config
 
 logger = logging.getLogger(__name__)
 
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+def _normalize_rows(vectors: np.ndarray) -> None:
+    """L2-normalizes the rows of a C-contiguous float32 array in place; zero rows stay zero."""
+    if faiss is not None:
+        faiss.normalize_L2(vectors)
+        return
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+def _aligned_empty(rows: int, dim: int) -> np.ndarray:
+    """
+    An uninitialized C-contiguous (rows, dim) float32 array whose data starts on a
+    64-byte boundary, so SIMD loads of a row never straddle a cache line at its start.
+    """
+    raw = np.empty(rows * dim + 16, dtype=np.float32)
+    offset = (-raw.ctypes.data) % 64 // raw.itemsize
+    return raw[offset:offset + rows * dim].reshape(rows, dim)
+
+class _HnswlibIndex:
+    """
+    An hnswlib graph behind the subset of the FAISS index API VectorStore uses, so it
+    can replace the trained FAISS index. hnswlib IDs are caller-assigned, so no
+    IndexIDMap wrapper is needed, and deletes are marked and their slots reused.
+    """
+    kind = "hnswlib"
+
+    def __init__(self, dim: int, capacity: int = 1024) -> None:
+        self.d = dim
+        self.is_trained = True
+        self.ntotal = 0
+        self.graph = hnswlib.Index(space="ip", dim=dim)
+        self.graph.init_index(max_elements=capacity, M=config.HNSW_M,
+                              ef_construction=config.HNSW_EF_CONSTRUCTION, allow_replace_deleted=True)
+        self.graph.set_ef(config.HNSW_EF_SEARCH)
+        self.graph.set_num_threads(config.FAISS_THREADS)
+
+    def add_with_ids(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        needed = self.ntotal + len(ids)
+        if needed > self.graph.get_max_elements():
+            self.graph.resize_index(max(needed, 2 * self.graph.get_max_elements()))
+        self.graph.add_items(vectors, ids, replace_deleted=True)
+        self.ntotal = needed
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        distances = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        found = min(k, self.ntotal)
+        if found:
+            labels, ip_distances = self.graph.knn_query(queries, k=found)
+            indices[:, :found] = labels
+            distances[:, :found] = 1 - ip_distances  # hnswlib's "ip" distance is 1 - inner product.
+        return distances, indices
+
+    def remove_ids(self, ids: np.ndarray) -> int:
+        for id_ in ids.tolist():
+            self.graph.mark_deleted(id_)
+        self.ntotal -= len(ids)
+        return len(ids)
+
+    def reconstruct_batch(self, ids: np.ndarray) -> np.ndarray:
+        return np.asarray(self.graph.get_items(ids), dtype=np.float32)
+
+    def reset(self) -> None:
+        self.__init__(self.d, self.graph.get_max_elements())
+
+    def write(self, path: str) -> None:
+        self.graph.save_index(path)
+
+    @classmethod
+    def read(cls, path: str, dim: int, ntotal: int) -> "_HnswlibIndex":
+        index = cls.__new__(cls)
+        index.d, index.is_trained, index.ntotal = dim, True, ntotal
+        index.graph = hnswlib.Index(space="ip", dim=dim)
+        index.graph.load_index(path, allow_replace_deleted=True)
+        index.graph.set_ef(config.HNSW_EF_SEARCH)
+        index.graph.set_num_threads(config.FAISS_THREADS)
+        return index
+
+class _NumpyIndex:
+    """
+    Exact inner-product search in NumPy, behind the same subset of the FAISS index API
+    as _HnswlibIndex. Used when FAISS is not installed: the vectors are the first
+    `ntotal` rows of one contiguous float32 matrix, so a search is a single BLAS
+    matrix product plus an O(n) argpartition for the top k.
+
+    The matrix doubles when full, and a delete moves the last row into the freed
+    one, so adds and deletes are amortized O(1) and live rows never have gaps.
+    """
+    kind = "numpy"
+
+    def __init__(self, dim: int, capacity: int = 1024) -> None:
+        self.d = dim
+        self.is_trained = True
+        self.ntotal = 0
+        self._matrix = _aligned_empty(capacity, dim)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._rows: Dict[int, int] = {}  # ID -> row of _matrix
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._matrix[:self.ntotal]
+
+    def reserve(self, capacity: int) -> None:
+        if capacity <= len(self._matrix):
+            return
+        matrix = _aligned_empty(capacity, self.d)
+        ids = np.empty(capacity, dtype=np.int64)
+        matrix[:self.ntotal] = self.vectors
+        ids[:self.ntotal] = self._ids[:self.ntotal]
+        self._matrix, self._ids = matrix, ids
+
+    def add_with_ids(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        start, end = self.ntotal, self.ntotal + len(ids)
+        if end > len(self._matrix):
+            self.reserve(max(end, 2 * len(self._matrix)))
+        self._matrix[start:end] = vectors
+        self._ids[start:end] = ids
+        self._rows.update(zip(ids.tolist(), range(start, end)))
+        self.ntotal = end
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        distances = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        n = self.ntotal
+        found = min(k, n)
+        if found:
+            # One query is a matrix-vector product (BLAS gemv), cheaper to dispatch than gemm.
+            scores = (self.vectors @ queries[0])[None] if len(queries) == 1 else queries @ self.vectors.T
+            rows = np.argpartition(scores, n - found, axis=1)[:, n - found:] if found < n \
+                else np.broadcast_to(np.arange(n), scores.shape)
+            top = np.take_along_axis(scores, rows, axis=1)
+            order = np.argsort(-top, axis=1)
+            distances[:, :found] = np.take_along_axis(top, order, axis=1)
+            indices[:, :found] = self._ids[np.take_along_axis(rows, order, axis=1)]
+        return distances, indices
+
+    def remove_ids(self, ids: np.ndarray) -> None:
+        for id_ in ids.tolist():
+            row = self._rows.pop(id_, None)
+            if row is None:
+                continue
+            last = self.ntotal - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved = self._ids[last]
+                self._rows[int(moved)] = row
+            self.ntotal = last
+
+    def reconstruct_batch(self, ids: np.ndarray) -> np.ndarray:
+        return self._matrix[[self._rows[id_] for id_ in ids.tolist()]]
+
+    def reset(self) -> None:
+        self.ntotal = 0
+        self._rows.clear()
+
+    def write(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.save(f, self._ids[:self.ntotal])
+            np.save(f, self.vectors)
+
+    @classmethod
+    def read(cls, path: str, dim: int, ntotal: int) -> "_NumpyIndex":
+        index = cls(dim, capacity=max(ntotal, 1024))
+        with open(path, "rb") as f:
+            ids = np.load(f)
+            index.add_with_ids(np.load(f), ids)
+        return index
+
+def _stored_ids(index: Any) -> np.ndarray:
+    """The IDs held by a freshly loaded index, for checking against its saved key map."""
+    if isinstance(index, _HnswlibIndex):
+        return np.asarray(index.graph.get_ids_list(), dtype=np.int64)
+    if isinstance(index, _NumpyIndex):
+        return index._ids[:index.ntotal]
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.vector_to_array(index.id_map)
+    # Only IVF indexes are stored without an ID map; their lists hold the IDs.
+    invlists = faiss.extract_index_ivf(index).invlists
+    return np.concatenate([np.empty(0, dtype=np.int64)] +
+                          [faiss.rev_swig_ptr(invlists.get_ids(i), invlists.list_size(i))
+                           for i in range(invlists.nlist) if invlists.list_size(i)])
+
+def _worker_loop(conn: Connection, store_kwargs: Dict[str, Any]) -> None:
+    """
+    Body of the long-lived FAISS worker process used when use_subprocess=True. It owns
+    an inline VectorStore and answers (seq, method_name, args) requests sent over
+    `conn` until it receives None.
+    """
+    store = VectorStore(use_subprocess=False, **store_kwargs)
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        seq, method_name, args = request
+        try:
+            conn.send((seq, True, getattr(store, method_name)(*args)))
+        except Exception as e:
+            conn.send((seq, False, f"{type(e).__name__}: {e}"))
+
 class VectorStore:
     """
     VectorStore wraps FAISS to support adding, searching, deleting, and resetting vectors.
+
+    Vectors are kept in an exact flat index until `min_train_size` of them have been
+    added; the index is then rebuilt with `index_factory` (an HNSW graph over int8
+    vectors by default) so search cost stops growing linearly with the cache.
+    With `config.RESCORE`, quantized candidates are re-ranked on float32 copies.
+
+    Indexes that cannot remove vectors (refined and HNSW ones) keep deleted vectors
+    as tombstones that search skips; the index is rebuilt from the live vectors once
+    tombstones exceed `config.TOMBSTONE_REBUILD_RATIO` of it.
+
+    Added and query vectors are L2-normalized internally, so inner-product scores are
+    cosine similarities whatever the caller passes in.
+
+    If FAISS is not installed, vectors are kept in an exact NumPy index instead.
     
-    By default, operations are executed inline (i.e. in the same process) to ensure
-    state is shared and to avoid timeouts. In production, you may enable subprocess isolation
-    (use_subprocess=True) if you experience segmentation faults from the FAISS C++ backend.
+    By default, operations are executed inline (i.e. in the same process). In production,
+    you may enable subprocess isolation (use_subprocess=True) if you experience segmentation
+    faults from the FAISS C++ backend: the index then lives in one long-lived worker
+    process and each operation is a pipe round-trip to it.
     """
-    def __init__(self, use_subprocess: bool = False) -> None:
-        self.dim: int = config.VECTOR_DIM
-        # Use Inner Product (IP) for stability
-        self.base_index = faiss.IndexFlatIP(self.dim)
-        self.index = faiss.IndexIDMap(self.base_index)
-        self.key_to_id: dict[str, int] = {}
-        self.id_to_key: dict[int, str] = {}
-        self.next_id: int = 0
+    def __init__(self,
+                 use_subprocess: bool = False,
+                 dim: Optional[int] = None,
+                 index_factory: str = config.INDEX_FACTORY,
+                 min_train_size: int = config.INDEX_MIN_TRAIN_SIZE,
+                 nprobe: Optional[int] = config.INDEX_NPROBE,
+                 add_batch_size: int = config.VECTOR_ADD_BATCH_SIZE,
+                 index_path: Optional[str] = config.INDEX_PATH,
+                 use_gpu: bool = config.USE_GPU,
+                 quantizer: Optional[str] = config.QUANTIZER,
+                 backend: str = config.VECTOR_BACKEND) -> None:
+        if quantizer not in (None, "bbq"):
+            raise ValueError(f"Unknown quantizer {quantizer!r}; expected None or 'bbq'")
+        if backend not in ("faiss", "hnswlib", "ivf"):
+            raise ValueError(f"Unknown backend {backend!r}; expected 'faiss', 'hnswlib' or 'ivf'")
+        if backend == "hnswlib" and hnswlib is None:
+            raise ImportError("VectorStore(backend='hnswlib') requires the hnswlib package")
+        if dim is None:
+            # Imported here: the embedding module loads the model, which only a store
+            # sized from it should pay for.
+            from semantic_cache.embedding import EMBEDDING_DIM
+            dim = EMBEDDING_DIM
+        self.dim: int = dim
         self.use_subprocess = use_subprocess
+        self.index_path = index_path
+        if use_subprocess:
+            # The worker builds its own inline store; this instance only forwards calls.
+            self._start_worker(dict(dim=self.dim, index_factory=index_factory, min_train_size=min_train_size,
+                                    nprobe=nprobe, add_batch_size=add_batch_size, index_path=index_path,
+                                    use_gpu=use_gpu, quantizer=quantizer, backend=backend))
+            return
+        if faiss is not None:
+            # Single-query searches over a cache-sized index are faster without OpenMP
+            # fan-out; raise FAISS_THREADS for large offline rebuilds or batch searches.
+            faiss.omp_set_num_threads(config.FAISS_THREADS)
+        else:
+            logger.warning("FAISS is not installed; using exact NumPy search.")
+        self.index_factory = index_factory
+        self.quantizer = quantizer
+        self.backend = backend
+        self.min_train_size = min_train_size
+        self.nprobe = nprobe
+        self.add_batch_size = add_batch_size
+        self._gpu_res = None
+        if use_gpu:
+            if hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0:
+                self._gpu_res = faiss.StandardGpuResources()
+            else:
+                logger.warning("FAISS_USE_GPU is set but no GPU build of FAISS or CUDA device is available; using the CPU.")
+        # Vectors accepted by add() but not yet handed to FAISS; see _flush(). The
+        # buffers are preallocated (64-byte aligned) and reused, as is the query buffer.
+        self._pending_vecs = _aligned_empty(add_batch_size, self.dim)
+        self._pending_ids = np.empty(add_batch_size, dtype=np.int64)
+        self._n_pending = 0
+        self._query_buf = _aligned_empty(1, self.dim)
+        # Guards the index, the key maps and the scratch buffers above.
+        self._lock = threading.RLock()
+        self._init_index()
+        self.key_to_id: dict[str, int] = {}
+        # IDs are dense and sequential, so the reverse map is a list indexed by ID;
+        # deleted IDs are set to None.
+        self.id_to_key: List[Optional[str]] = []
+        # IDs deleted from the key maps whose vectors are still in the index.
+        self._tombstones: Set[int] = set()
+        if index_path and os.path.exists(index_path):
+            try:
+                self.load(index_path)
+            except (ValueError, OSError, EOFError, pickle.UnpicklingError, RuntimeError) as e:
+                logger.warning(f"Not loading FAISS index from {index_path}, starting empty: {e}")
         logger.info(f"Initialized FAISS vector store with IndexIDMap, dimension: {self.dim}, use_subprocess: {self.use_subprocess}")
 
-    def _run_faiss_task(self, method_name: str, *args: Any, timeout: int = 100) -> None:
+    def __len__(self) -> int:
+        """Number of keys currently stored."""
+        if self.use_subprocess:
+            return self._call_worker("__len__", default=0)
+        return len(self.key_to_id)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a vector is stored for `key`."""
+        if self.use_subprocess:
+            return self._call_worker("__contains__", key, default=False)
+        return key in self.key_to_id
+
+    def _start_worker(self, store_kwargs: Dict[str, Any]) -> None:
+        # A bare pipe: unlike a Queue it needs no feeder thread, and unlike a Manager
+        # no server process.
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._worker_lock = threading.Lock()
+        self._seq = 0
+        self._worker = multiprocessing.Process(target=_worker_loop, name="VectorStoreWorker",
+                                               args=(child_conn, store_kwargs), daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Stops the worker process, if any. The store is unusable afterwards."""
+        if not self.use_subprocess or not self._worker.is_alive():
+            return
+        with self._worker_lock:
+            self._conn.send(None)
+        self._worker.join(config.FAISS_WORKER_TIMEOUT)
+        if self._worker.is_alive():
+            self._worker.terminate()
+
+    def _init_index(self) -> None:
+        """
+        Creates an empty exact (flat) index. It serves searches while the cache is cold,
+        until enough vectors have been added to train the ANN index.
+        """
+        if faiss is None:
+            self._set_index(_NumpyIndex(self.dim))
+            self.is_trained = True  # Nothing to train without FAISS.
+        else:
+            # Use Inner Product (IP) for stability
+            self._set_index(faiss.IndexIDMap(faiss.IndexFlatIP(self.dim)))
+            self.is_trained = self.index_factory in (None, "", "Flat")
+        self._warmed_up = False
+
+    def _maybe_train_index(self) -> None:
+        """
+        Rebuilds the index with `index_factory` once the flat index holds at least
+        `min_train_size` vectors, training it on those vectors.
+        """
+        if self.is_trained or self.base_index.ntotal < self.min_train_size:
+            return
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.base_index.reconstruct_n(0, self.base_index.ntotal)
+        if self.backend == "hnswlib":
+            self._set_index(_HnswlibIndex(self.dim, capacity=2 * len(ids)))
+            self.index.add_with_ids(vectors, ids)
+            self.is_trained = True
+            self._warmed_up = False
+            logger.info(f"Built hnswlib index on {len(ids)} vectors.")
+            return
+        factory = self.index_factory
+        if self.backend == "ivf":
+            factory = f"IVF{max(int(2 * np.sqrt(len(ids))), 20)},{config.IVF_CODEC}"
+        if self.quantizer == "bbq":
+            # One bit per dimension: sign of the randomly rotated vector.
+            ann_index = faiss.IndexLSH(self.dim, self.dim, True, False)
+            # Hamming search ignores the metric; it tells a refine stage to rank by inner product.
+            ann_index.metric_type = faiss.METRIC_INNER_PRODUCT
+        else:
+            ann_index = faiss.index_factory(self.dim, factory, faiss.METRIC_INNER_PRODUCT)
+        ann_index.train(vectors)
+        ivf = faiss.try_extract_index_ivf(ann_index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe or max(1, min(ivf.nlist // 4, 10))
+        if hasattr(ann_index, "hnsw"):
+            ann_index.hnsw.efConstruction = config.HNSW_EF_CONSTRUCTION
+            ann_index.hnsw.efSearch = config.HNSW_EF_SEARCH
+        if config.RESCORE and not isinstance(ann_index, faiss.IndexRefine):
+            ann_index = faiss.IndexRefineFlat(ann_index)
+            ann_index.k_factor = config.RESCORE_K_FACTOR
+        if ivf is not None and not isinstance(ann_index, faiss.IndexRefine):
+            # IVF lists store the caller's IDs themselves. An IndexIDMap2 around them
+            # would compact its id_map on removal as if the rows had been renumbered,
+            # mapping every later ID to the wrong key. A hashtable direct map keeps
+            # reconstruct() working for rebuilds.
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+            self._set_index(ann_index)
+        else:
+            self._set_index(faiss.IndexIDMap2(ann_index))
+        self.index.add_with_ids(vectors, ids)
+        self.is_trained = True
+        self._warmed_up = False
+        logger.info(f"Trained FAISS index '{self.quantizer or factory}' on {len(ids)} vectors.")
+
+    def _set_index(self, index: "faiss.Index") -> None:
+        """
+        Installs `index` (an ID map over the actual index, an IVF index holding the
+        IDs itself, an _HnswlibIndex or a _NumpyIndex), first copying it to the GPU
+        when one is in use. Index types without GPU support stay on the CPU.
         """
-        Runs a FAISS operation either inline or in a subprocess.
+        if isinstance(index, (_HnswlibIndex, _NumpyIndex)):
+            self.index = self.base_index = index
+            return
+        if self._gpu_res is not None:
+            try:
+                index = faiss.index_cpu_to_gpu(self._gpu_res, config.GPU_DEVICE, index)
+            except RuntimeError as e:
+                logger.warning(f"Keeping FAISS index on the CPU: {e}")
+        self.index = index
+        self.base_index = faiss.downcast_index(index.index if isinstance(index, faiss.IndexIDMap) else index)
+
+    def _call_worker(self, method_name: str, *args: Any, default: Any = None,
+                     timeout: float = config.FAISS_WORKER_TIMEOUT) -> Any:
+        """
+        Runs a VectorStore method in the worker process (use_subprocess=True only).
         
         Args:
             method_name (str): Name of the method to run.
             *args: Arguments to pass to that method.
-            timeout (int): Timeout in seconds (only used in subprocess mode).
+            default: Returned if the worker fails or times out.
+            timeout (float): Timeout in seconds.
         """
-        if not self.use_subprocess:
-            getattr(self, method_name)(*args)
-            return
-        process = multiprocessing.Process(target=getattr(self, method_name), args=args)
-        process.start()
-        process.join(timeout)
-        if process.is_alive():
-            logger.error(f"FAISS task '{method_name}' timed out. Terminating process.")
-            process.terminate()
-            process.join()
-        if process.exitcode not in (0, None):
-            logger.error(f"FAISS task '{method_name}' failed with exit code {process.exitcode}.")
-
-    def add_vector(self, key: str, vector: np.ndarray) -> None:
+        with self._worker_lock:
+            self._seq += 1
+            seq = self._seq
+            deadline = time.monotonic() + timeout
+            try:
+                self._conn.send((seq, method_name, args))
+                while True:
+                    if not self._conn.poll(max(deadline - time.monotonic(), 0)):
+                        logger.error(f"FAISS task '{method_name}' timed out.")
+                        return default
+                    resp_seq, ok, result = self._conn.recv()
+                    if resp_seq == seq:
+                        break
+                    # Late reply to a request that already timed out; drop it.
+            except (EOFError, OSError) as e:
+                logger.error(f"FAISS worker unavailable for task '{method_name}': {e}")
+                return default
+        if not ok:
+            logger.error(f"FAISS task '{method_name}' failed: {result}")
+            return default
+        return result
+
+    def add(self, key: str, vector: np.ndarray) -> None:
         """
         Adds a new vector with a unique ID to the FAISS index.
         
@@ -58,45 +469,117 @@ class VectorStore:
             key (str): Unique key associated with the vector.
             vector (np.ndarray): A 1D numpy array with shape (self.dim,).
         """
+        if self.use_subprocess:
+            self._call_worker("add", key, vector)
+            return
         if vector.shape[0] != self.dim:
             raise ValueError(f"Vector dimension mismatch: Expected {self.dim}, got {vector.shape[0]}")
-        vector = vector.reshape(1, -1).astype("float32")
-        cur_id = self.next_id
-        self.next_id += 1
-        try:
-            self.index.add_with_ids(vector, np.array([cur_id], dtype=np.int64))
+        with self._lock:
+            old_id = self.key_to_id.get(key)
+            if old_id is not None:
+                self._flush()
+                self._remove_ids([old_id])  # Re-added key: drop the stale vector.
+            cur_id = len(self.id_to_key)
+            np.copyto(self._pending_vecs[self._n_pending], vector)
+            self._pending_ids[self._n_pending] = cur_id
+            self._n_pending += 1
             self.key_to_id[key] = cur_id
-            self.id_to_key[cur_id] = key
-            logger.info(f"Added vector for key {key} with ID {cur_id}")
-        except Exception as e:
-            logger.error(f"Error adding vector for key {key}: {e}")
+            self.id_to_key.append(key)
+            logger.debug("Added vector for key %s with ID %d", key, cur_id)
+            if self._n_pending >= self.add_batch_size:
+                self._flush()
 
-    def add(self, key: str, vector: np.ndarray) -> None:
+    def add_vectors(self, keys: List[str], vectors: np.ndarray) -> None:
         """
-        Runs the add_vector operation.
+        Adds many vectors at once with a single add_with_ids call, for bulk loading.
+        
+        Args:
+            keys (List[str]): Unique keys, one per row of `vectors`.
+            vectors (np.ndarray): A 2D numpy array with shape (len(keys), self.dim).
         """
-        self._run_faiss_task("add_vector", key, vector)
+        if self.use_subprocess:
+            self._call_worker("add_vectors", keys, vectors)
+            return
+        n = len(keys)
+        if vectors.shape != (n, self.dim):
+            raise ValueError(f"Vector shape mismatch: Expected {(n, self.dim)}, got {vectors.shape}")
+        vectors = np.array(vectors, dtype=np.float32, order="C")  # Own copy to normalize.
+        _normalize_rows(vectors)
+        with self._lock:
+            self._flush()  # Keep IDs in insertion order.
+            start = len(self.id_to_key)
+            self.id_to_key.extend(keys)
+            stale_ids = []
+            for cur_id, key in enumerate(keys, start):
+                old_id = self.key_to_id.get(key)
+                if old_id is not None:
+                    stale_ids.append(old_id)
+                self.key_to_id[key] = cur_id
+            self._add_to_index(vectors, np.arange(start, start + n, dtype=np.int64))
+            if stale_ids:
+                self._remove_ids(stale_ids)
+            logger.info(f"Added {n} vectors with IDs {start}-{start + n - 1}")
 
-    def search_vectors(self, vector: np.ndarray, top_k: int, results: ListProxy) -> None:
+    def reserve(self, capacity: int) -> None:
         """
-        Searches the FAISS index for the top_k most similar vectors and appends results to the shared list.
+        Preallocates room for `capacity` vectors so that filling the flat index does not
+        repeatedly reallocate and copy its storage. Trained ANN indexes grow per list or
+        graph level and are left as they are.
         
         Args:
-            vector (np.ndarray): Query vector of shape (self.dim,).
-            top_k (int): Number of top results to retrieve.
-            results (ListProxy): Shared list to store tuples (key, distance).
+            capacity (int): Total number of vectors expected.
+        """
+        if self.use_subprocess:
+            self._call_worker("reserve", capacity)
+            return
+        with self._lock:
+            if isinstance(self.index, _NumpyIndex):
+                self.index.reserve(capacity)
+                return
+            if faiss is None or not isinstance(self.base_index, faiss.IndexFlat):
+                logger.debug("reserve() has no effect on %s", type(self.base_index).__name__)
+                return
+            # Growing then shrinking a std::vector keeps its capacity; neither wrapper
+            # exposes reserve() itself.
+            for storage, size in ((self.base_index.codes, capacity * self.base_index.code_size),
+                                  (self.index.id_map, capacity)):
+                current = storage.size()
+                if size > current:
+                    storage.resize(size)
+                    storage.resize(current)
+
+    def _flush(self) -> None:
+        """
+        Adds all pending vectors to the FAISS index in a single add_with_ids call.
+        Called with the lock held when the batch is full and before any search or delete.
+        """
+        if not self._n_pending:
+            return
+        # FAISS copies the rows it is given, so the buffers can be reused right away.
+        n, self._n_pending = self._n_pending, 0
+        _normalize_rows(self._pending_vecs[:n])
+        self._add_to_index(self._pending_vecs[:n], self._pending_ids[:n])
+
+    def _add_to_index(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """
+        Adds `vectors` under `ids` to the index, training it once enough have arrived.
+        On failure the keys of `ids` are dropped so they are not reported as stored.
         """
-        if vector.shape[0] != self.dim:
-            raise ValueError(f"Vector dimension mismatch: Expected {self.dim}, got {vector.shape[0]}")
-        vector = vector.reshape(1, -1).astype("float32")
         try:
-            distances, indices = self.index.search(vector, top_k)
-            for dist, idx in zip(distances[0], indices[0]):
-                if idx in self.id_to_key:
-                    results.append((self.id_to_key[idx], dist))
-            logger.info(f"FAISS search results: {list(results)}")
+            self.index.add_with_ids(vectors, ids)
+            logger.debug("Flushed %d vectors to FAISS index.", len(ids))
+            self._maybe_train_index()
+            if not self._warmed_up:
+                # Fault in index pages and kernel dispatch before the first real query.
+                self.index.search(np.zeros((1, self.dim), dtype=np.float32), 1)
+                self._warmed_up = True
         except Exception as e:
-            logger.error(f"Error during FAISS search: {e}")
+            logger.error(f"Error adding {len(ids)} vectors to FAISS index: {e}")
+            for failed_id in ids.tolist():
+                failed_key = self.id_to_key[failed_id]
+                self.id_to_key[failed_id] = None
+                if self.key_to_id.get(failed_key) == failed_id:
+                    del self.key_to_id[failed_key]
 
     def search(self, vector: np.ndarray, top_k: int = 1) -> List[Tuple[str, float]]:
         """
@@ -109,71 +592,249 @@ class VectorStore:
         Returns:
             List of tuples (key, distance).
         """
-        if not self.use_subprocess:
+        if self.use_subprocess:
+            return self._call_worker("search", vector, top_k, default=[])
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Query shape mismatch: Expected ({self.dim},), got {vector.shape}")
+        with self._lock:
+            self._flush()
+            if self.index.ntotal == 0:
+                return []
             try:
-                vector = vector.reshape(1, -1).astype("float32")
-                distances, indices = self.index.search(vector, top_k)
-                results: List[Tuple[str, float]] = []
-                for dist, idx in zip(distances[0], indices[0]):
-                    if idx in self.id_to_key:
-                        results.append((self.id_to_key[idx], dist))
-                logger.info(f"FAISS search results (inline): {results}")
+                # Normalized in the scratch buffer so the caller's array is left untouched;
+                # copyto also converts any other dtype or layout in this single pass.
+                np.copyto(self._query_buf[0], vector)
+                _normalize_rows(self._query_buf)
+                distances, indices = self._search_index(self._query_buf, top_k)
+                results = self._gather(distances[0], indices[0], top_k)
+                logger.debug("FAISS search results: %r", results)
                 return results
             except Exception as e:
-                logger.error(f"Error during inline FAISS search: {e}")
+                logger.error(f"Error during FAISS search: {e}")
                 return []
-        else:
-            manager = multiprocessing.Manager()
-            results: ListProxy = manager.list()
-            process = multiprocessing.Process(target=self.search_vectors, args=(vector, top_k, results))
-            process.start()
-            process.join(30)
-            if process.is_alive():
-                logger.error("FAISS search timed out. Terminating process.")
-                process.terminate()
-                process.join()
-            return list(results)
-
-    def delete_vector(self, key: str) -> None:
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 1) -> List[List[Tuple[str, float]]]:
+        """
+        Searches for many query vectors with a single FAISS call.
+        
+        Args:
+            queries (np.ndarray): A 2D numpy array with shape (n, self.dim).
+            top_k (int): Number of results to retrieve per query.
+            
+        Returns:
+            One list of (key, distance) tuples per query row.
+        """
+        if self.use_subprocess:
+            return self._call_worker("search_batch", queries, top_k, default=[[] for _ in queries])
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"Query shape mismatch: Expected (n, {self.dim}), got {queries.shape}")
+        queries = np.array(queries, dtype=np.float32, order="C")  # Own copy to normalize.
+        _normalize_rows(queries)
+        with self._lock:
+            self._flush()
+            if self.index.ntotal == 0:
+                return [[] for _ in range(len(queries))]
+            try:
+                distances, indices = self._search_index(queries, top_k)
+                return [self._gather(row_distances, row_indices, top_k)
+                        for row_distances, row_indices in zip(distances, indices)]
+            except Exception as e:
+                logger.error(f"Error during FAISS batch search: {e}")
+                return [[] for _ in range(len(queries))]
+
+    def _search_index(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Runs normalized float32 `queries` against the index, returning inner-product
+        scores and IDs. While there are tombstones, up to twice `top_k` neighbours are
+        fetched so that deleted vectors among them do not crowd out live ones. Called
+        with the lock held.
+        """
+        top_k += min(len(self._tombstones), top_k)
+        if faiss is None:
+            return self.index.search(queries, top_k)
+        if isinstance(self.base_index, faiss.IndexFlatIP) and self.index.ntotal <= config.BRUTE_FORCE_MAX_N:
+            return self._brute_force_search(queries, top_k)
+        distances, indices = self.index.search(queries, top_k)
+        if isinstance(self.base_index, faiss.IndexLSH):
+            # Hamming distance h over b sign bits estimates cosine as cos(pi * h / b).
+            distances = np.cos(np.pi / self.base_index.nbits * distances)
+        return distances, indices
+
+    def _gather(self, distances: np.ndarray, indices: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Maps one row of search output to at most `top_k` (key, distance) pairs, skipping deleted IDs."""
+        # FAISS pads missing neighbours with -1; every other ID indexes id_to_key.
+        found = indices >= 0
+        id_to_key = self.id_to_key
+        return [(id_to_key[idx], dist)
+                for idx, dist in zip(indices[found].tolist(), distances[found].tolist())
+                if id_to_key[idx] is not None][:top_k]
+
+    def _brute_force_search(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Searches the flat index's vectors in place with faiss.knn, skipping the
+        IndexIDMap dispatch and ID translation pass. Called with the lock held.
+        """
+        n = self.base_index.ntotal
+        vectors = faiss.rev_swig_ptr(self.base_index.get_xb(), n * self.dim).reshape(n, self.dim)
+        distances, rows = faiss.knn(queries, vectors, top_k, faiss.METRIC_INNER_PRODUCT)
+        ids = faiss.rev_swig_ptr(self.index.id_map.data(), n)
+        return distances, np.where(rows >= 0, ids[rows], -1)
+
+    def delete(self, key: str) -> None:
         """
         Deletes the vector associated with the given key from the FAISS index.
         
         Args:
             key (str): The key of the vector to delete.
         """
-        if key not in self.key_to_id:
-            logger.warning(f"Key {key} not found in FAISS index.")
+        self.delete_many([key])
+
+    def delete_many(self, keys: List[str]) -> None:
+        """
+        Deletes the vectors of all given keys with a single pass over the FAISS index.
+        
+        Args:
+            keys (List[str]): The keys of the vectors to delete. Unknown keys are skipped.
+        """
+        if self.use_subprocess:
+            self._call_worker("delete_many", keys)
             return
-        id_to_remove = self.key_to_id[key]
-        try:
-            self.index.remove_ids(np.array([id_to_remove], dtype=np.int64))
-            del self.key_to_id[key]
-            del self.id_to_key[id_to_remove]
-            gc.collect()
-            logger.info(f"Deleted vector for key {key} (ID {id_to_remove}) from FAISS index.")
-        except Exception as e:
-            logger.error(f"Error deleting vector for key {key}: {e}")
+        with self._lock:
+            ids = [self.key_to_id.pop(key) for key in keys if key in self.key_to_id]
+            if len(ids) < len(keys):
+                logger.warning(f"{len(keys) - len(ids)} of {len(keys)} keys not found in FAISS index.")
+            if not ids:
+                return
+            self._flush()
+            self._remove_ids(ids)
+            logger.info(f"Deleted {len(ids)} vectors from FAISS index.")
 
-    def delete(self, key: str) -> None:
+    def _remove_ids(self, ids: List[int]) -> None:
         """
-        Executes the delete_vector operation.
+        Removes flushed `ids` from the index and the reverse key map. Called with the
+        lock held; indexes without removal support record them as tombstones instead.
         """
-        self._run_faiss_task("delete_vector", key)
+        for id_ in ids:
+            self.id_to_key[id_] = None
+        id_array = np.asarray(ids, dtype=np.int64)
+        try:
+            if isinstance(self.index, (_HnswlibIndex, _NumpyIndex)):
+                self.index.remove_ids(id_array)
+            elif isinstance(self.index, faiss.IndexIDMap):
+                self.index.remove_ids(faiss.IDSelectorBatch(id_array.size, faiss.swig_ptr(id_array)))
+            else:
+                # An IVF index's hashtable direct map only removes an explicit ID array.
+                self.index.remove_ids(faiss.IDSelectorArray(id_array.size, faiss.swig_ptr(id_array)))
+        except RuntimeError as e:
+            # Refined and graph-based indexes do not support removal; the tombstoned
+            # vector is skipped in search results since its key mapping is gone.
+            logger.debug("FAISS index does not support removing IDs %s: %s", ids, e)
+            self._tombstones.update(ids)
+            if len(self._tombstones) > config.TOMBSTONE_REBUILD_RATIO * self.index.ntotal:
+                self._rebuild_index()
 
-    def reset_index_process(self) -> None:
+    def _rebuild_index(self) -> None:
         """
-        Internal method to reset the FAISS index. Intended for subprocess execution.
+        Re-adds the live vectors to an emptied copy of the trained index, dropping
+        tombstones. Called with the lock held.
         """
-        self.base_index = faiss.IndexFlatIP(self.dim)
-        self.index = faiss.IndexIDMap(self.base_index)
-        self.key_to_id.clear()
-        self.id_to_key.clear()
-        self.next_id = 0
-        gc.collect()
-        logger.info("FAISS index has been reset.")
+        live_ids = np.fromiter((i for i, key in enumerate(self.id_to_key) if key is not None),
+                               dtype=np.int64)
+        vectors = self.index.reconstruct_batch(live_ids) if len(live_ids) else None
+        self.index.reset()
+        if vectors is not None:
+            self.index.add_with_ids(vectors, live_ids)
+        logger.info(f"Rebuilt FAISS index, dropping {len(self._tombstones)} deleted vectors.")
+        self._tombstones.clear()
 
     def reset_index(self) -> None:
         """
-        Executes the reset_index_process operation.
+        Removes all vectors and keys, returning to an empty untrained index.
+        """
+        if self.use_subprocess:
+            self._call_worker("reset_index")
+            return
+        with self._lock:
+            if isinstance(self.index, _NumpyIndex) or (faiss is not None and isinstance(self.base_index, faiss.IndexFlat)):
+                # Still the exact index: empty it in place, keeping its allocated storage.
+                self.index.reset()
+            else:
+                self._init_index()
+            self._n_pending = 0
+            self.key_to_id.clear()
+            self.id_to_key.clear()
+            self._tombstones.clear()
+            logger.info("FAISS index has been reset.")
+
+    def save(self, path: str) -> None:
+        """
+        Writes the FAISS index to `path` and the key mapping to `path + '.meta'`, so a
+        restarted process can reload the vectors instead of re-embedding every query.
+        Both files are written to temporaries first and then renamed into place.
+        """
+        if self.use_subprocess:
+            self._call_worker("save", path)
+            return
+        with self._lock:
+            self._flush()
+            backend = getattr(self.index, "kind", "faiss")
+            if backend != "faiss":
+                self.index.write(path + ".tmp")
+            else:
+                index = faiss.index_gpu_to_cpu(self.index) if self._gpu_res is not None else self.index
+                faiss.write_index(index, path + ".tmp")
+            with open(path + ".meta.tmp", "wb") as f:
+                pickle.dump({"id_to_key": self.id_to_key, "is_trained": self.is_trained,
+                             "tombstones": self._tombstones, "dim": self.dim,
+                             "model": config.EMBEDDING_MODEL_NAME,
+                             "backend": backend,
+                             "ntotal": self.index.ntotal}, f)
+            # Still under the lock, so a concurrent save cannot pair its index with this meta.
+            os.replace(path + ".tmp", path)
+            os.replace(path + ".meta.tmp", path + ".meta")
+        logger.info(f"Saved FAISS index with {len(self.key_to_id)} keys to {path}")
+
+    def load(self, path: str, mmap: bool = config.INDEX_MMAP) -> None:
+        """
+        Replaces the current index and key mapping with those saved by `save(path)`.
+        
+        Args:
+            path (str): Path the index was saved to.
+            mmap (bool): Memory-map the index's IVF lists read-only instead of reading them.
+        
+        Raises:
+            ValueError: If the index was built for another embedding model or dimension,
+                or does not match its key mapping (e.g. a save interrupted between
+                replacing the two files).
         """
-        self._run_faiss_task("reset_index_process")
+        if self.use_subprocess:
+            self._call_worker("load", path, mmap)
+            return
+        with open(path + ".meta", "rb") as f:
+            meta = pickle.load(f)
+        saved = (meta.get("model", config.EMBEDDING_MODEL_NAME), meta.get("dim", self.dim))
+        if saved != (config.EMBEDDING_MODEL_NAME, self.dim):
+            raise ValueError(f"index was built for model {saved[0]} with dimension {saved[1]}")
+        if meta.get("backend") == "hnswlib":
+            if hnswlib is None:
+                raise ValueError("index was built with hnswlib, which is not installed")
+            index = _HnswlibIndex.read(path, self.dim, meta["ntotal"])
+        elif meta.get("backend") == "numpy":
+            index = _NumpyIndex.read(path, self.dim, meta["ntotal"])
+        elif faiss is None:
+            raise ValueError("index was built with FAISS, which is not installed")
+        else:
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP if mmap else 0)
+        ids = _stored_ids(index)
+        if index.ntotal != meta["ntotal"] or (ids.size and ids.max() >= len(meta["id_to_key"])):
+            raise ValueError(f"index holds {index.ntotal} vectors that do not match its saved "
+                             f"key mapping ({meta['ntotal']} vectors, {len(meta['id_to_key'])} IDs)")
+        with self._lock:
+            self._set_index(index)
+            self.is_trained = meta["is_trained"]
+            self._warmed_up = False
+            self._n_pending = 0
+            self.id_to_key = meta["id_to_key"]
+            self.key_to_id = {key: i for i, key in enumerate(self.id_to_key) if key is not None}
+            self._tombstones = meta.get("tombstones", set())
+        logger.info(f"Loaded FAISS index with {len(self.key_to_id)} keys from {path}")
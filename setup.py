@@ -6,14 +6,17 @@ setup(
     version='0.1.0',
     packages=find_packages(),
     install_requires=[
-        'numpy',
-        'redis',
-        'faiss-cpu',
-        'numpy',
-        'sentence-transformers',
-        'pytest',
-        'fakeredis'
+        'numpy>=1.24',
+        'redis>=5.0',
+        'faiss-cpu>=1.8.0',
+        'sentence-transformers>=2.7',
+        'orjson'
     ],
+    extras_require={
+        'test': ['pytest', 'fakeredis>=2.20'],
+        'gpu': ['faiss-gpu-cuvs>=1.8.0'],
+        'hnswlib': ['hnswlib>=0.8'],
+    },
     author='Subhagato Adak',
     author_email='subhagatoadak.india@gmail.com',
     description='A production-grade semantic caching solution for generative AI tools',
@@ -1,4 +1,4 @@
-import pytest
+import numpy as np
 from semantic_cache.persistent_cache import PersistentCache
 from semantic_cache.session_cache import SessionCache
 from semantic_cache.vector_store import VectorStore
@@ -24,3 +24,48 @@ def test_cache_manager_set_get_invalidate():
     # Invalidate the cache for the query.
     cache_manager.invalidate(query)
     assert cache_manager.get(query) is None, "CacheManager: Cache should be invalidated after deletion."
+
+def test_cache_manager_set_reuses_embedding_from_get():
+    persistent_cache = PersistentCache()
+    session_cache = SessionCache(max_size=10, ttl=10)
+    vector_store = VectorStore(use_subprocess=False)
+    cache_manager = CacheManager(persistent_cache, session_cache, vector_store)
+
+    query = "What is the weather today?"
+    key = cache_manager.get_cache_key(query)
+    embedding = np.ones(vector_store.dim, dtype="float32") / np.sqrt(vector_store.dim)
+    # Simulate the embedding computed by a missed get().
+    cache_manager._remember_embedding(key, embedding)
+
+    cache_manager.set(query, "It's sunny and 25°C.")
+    assert key in vector_store, "CacheManager: set() should index the remembered embedding."
+    assert cache_manager._pop_embedding(key) is None, "CacheManager: Remembered embedding should be consumed by set()."
+
+class _StubVectorStore:
+    """Returns preset search results, as if they were the nearest cached queries."""
+    index_path = None
+
+    def __init__(self, results):
+        self.results = results
+
+    def __len__(self):
+        return len(self.results)
+
+    def search(self, vector, top_k=1):
+        return self.results
+
+def test_cache_manager_similarity_threshold():
+    persistent_cache = PersistentCache()
+    persistent_cache.set("close_key", "close response")
+    persistent_cache.set("far_key", "far response")
+    threshold = 0.8
+    vector_store = _StubVectorStore([("close_key", threshold + 0.05)])
+    cache_manager = CacheManager(persistent_cache, SessionCache(max_size=10, ttl=10), vector_store,
+                                 similarity_threshold=threshold)
+    cache_manager._generate_embedding = lambda query: np.zeros(8, dtype="float32")
+
+    assert cache_manager.get("a close paraphrase") == "close response", \
+        "CacheManager: A match above the threshold should be a semantic hit."
+    vector_store.results = [("far_key", threshold - 0.05)]
+    assert cache_manager.get("an unrelated query") is None, \
+        "CacheManager: A match below the threshold should not be served."
@@ -1,13 +1,82 @@
+from concurrent.futures import Future
 import numpy as np
 import pytest
-from semantic_cache import config
-from semantic_cache.embedding import generate_embedding
+from semantic_cache import config, embedding
+from semantic_cache.embedding import EMBEDDING_DIM, BatchedEmbedder, generate_embedding
 
 def test_generate_embedding_shape_and_normalization():
     query = "Test query for embedding"
     embedding = generate_embedding(query)
     # Check that the embedding has the correct dimension
-    assert embedding.shape[0] == config.VECTOR_DIM, f"Expected {config.VECTOR_DIM}, got {embedding.shape[0]}"
+    assert embedding.shape[0] == EMBEDDING_DIM, f"Expected {EMBEDDING_DIM}, got {embedding.shape[0]}"
     # Check that the embedding norm is non-zero
     norm = np.linalg.norm(embedding)
     assert norm > 0, "Embedding norm should be > 0"
+
+class _StubModel:
+    """Just enough of a SentenceTransformer for BatchedEmbedder to start."""
+    def tokenize(self, texts):
+        return {"text": texts}
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """A randomly initialised two-layer BERT SentenceTransformer, built without the network."""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    path = tmp_path_factory.mktemp("tiny_bert")
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + "what is the weather today how are you".split()
+    (path / "vocab.txt").write_text("\n".join(words))
+    BertTokenizerFast(str(path / "vocab.txt")).save_pretrained(path)
+    torch.manual_seed(0)
+    BertModel(BertConfig(vocab_size=len(words), hidden_size=32, num_hidden_layers=2,
+                         num_attention_heads=2, intermediate_size=64)).save_pretrained(path)
+    transformer = models.Transformer(str(path))
+    return SentenceTransformer(modules=[transformer, models.Pooling(32)], device="cpu").eval()
+
+def test_batched_embedder_matches_encode(tiny_model):
+    embedder = BatchedEmbedder(tiny_model, batch_size=8, max_wait=0.05)
+    queries = ["what", "how are you today", "what is the weather"]
+    futures = [embedder.submit(query) for query in queries]
+    batched = np.stack([future.result(timeout=10) for future in futures])
+    expected = tiny_model.encode(queries, normalize_embeddings=True)
+    assert np.allclose(batched, expected, atol=1e-5), "BatchedEmbedder: Padded batches should match encode()."
+
+    embedder.submit("what").result(timeout=10)
+    assert embedder._tokenize.cache_info().hits >= 1, "BatchedEmbedder: Repeated queries should reuse tokens."
+
+def test_batched_embedder_coalesces_requests():
+    embedder = BatchedEmbedder(_StubModel(), batch_size=4, max_wait=0.5)
+    batch_sizes = []
+    def encode(queries):
+        batch_sizes.append(len(queries))
+        return np.zeros((len(queries), 2), dtype=np.float32)
+    embedder._encode = encode
+    futures = [embedder.submit(f"query {i}") for i in range(5)]
+    for future in futures:
+        future.result(timeout=5)
+    assert batch_sizes == [4, 1], "BatchedEmbedder: Queued queries should share a batch up to batch_size."
+
+def test_batched_embedder_propagates_errors():
+    embedder = BatchedEmbedder(_StubModel(), batch_size=4, max_wait=0.2)
+    def encode(queries):
+        raise RuntimeError("model failed")
+    embedder._encode = encode
+    futures = [embedder.submit(f"query {i}") for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+
+def test_generate_embedding_retries_after_timeout(monkeypatch):
+    expected = np.ones(2, dtype=np.float32)
+    done = Future()
+    done.set_result(expected)
+    futures = [Future(), done]  # The first request never completes.
+    class _StubEmbedder:
+        def submit(self, query):
+            return futures.pop(0)
+    monkeypatch.setattr(embedding, "embedder", _StubEmbedder())
+    monkeypatch.setattr(config, "EMBEDDING_TIMEOUT", 0.05)
+    monkeypatch.setattr(config, "EMBEDDING_RETRY_DELAY", 0)
+    assert generate_embedding("query") is expected
+    assert not futures, "generate_embedding: A timed-out request should be retried."
@@ -1,4 +1,3 @@
-import pytest
 from semantic_cache.persistent_cache import PersistentCache
 
 def test_persistent_cache_set_get_delete():
@@ -14,3 +13,17 @@ def test_persistent_cache_set_get_delete():
     # Delete the key and verify deletion
     cache.delete(key)
     assert cache.get(key) is None, "PersistentCache: Value should be None after deletion."
+
+def test_persistent_cache_mget():
+    cache = PersistentCache()
+    cache.set("key_a", "value_a")
+    cache.set("key_b", {"data": "value_b"})
+    results = cache.mget(["key_a", "missing", "key_b"])
+    assert results == ["value_a", None, {"data": "value_b"}], "PersistentCache: mget should return values in key order."
+
+def test_persistent_cache_preserves_non_json_values():
+    cache = PersistentCache()
+    cache.set("json_key", "It's sunny and 25°C.")
+    cache.set("tuple_key", ("a", 1))
+    assert cache.get("json_key") == "It's sunny and 25°C."
+    assert cache.get("tuple_key") == ("a", 1), "PersistentCache: Values JSON cannot represent should round-trip via pickle."
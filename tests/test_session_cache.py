@@ -1,5 +1,4 @@
 import time
-import pytest
 from semantic_cache.session_cache import SessionCache
 
 def test_session_cache_set_get():
@@ -24,3 +23,29 @@ def test_session_cache_delete_and_metrics():
     # Test that metrics exist (assuming get_metrics is added)
     metrics = cache.get_metrics()
     assert "hits" in metrics and "misses" in metrics, "SessionCache: Metrics should include 'hits' and 'misses'."
+
+def test_session_cache_sharded():
+    cache = SessionCache(max_size=1024, ttl=10, num_shards=16)
+    assert len(cache.shards) == 16, "SessionCache: Large caches should be split into shards."
+    for i in range(100):
+        cache.set(f"key_{i}", i)
+    assert all(cache.get(f"key_{i}") == i for i in range(100)), "SessionCache: All keys should be retrievable."
+    assert cache.get("missing") is None
+    assert cache.get_metrics() == {"hits": 100, "misses": 1, "evictions": 0, "expirations": 0}, \
+        "SessionCache: Metrics should aggregate across shards."
+
+def test_session_cache_eviction_metrics():
+    cache = SessionCache(max_size=2, ttl=10)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") is None, "SessionCache: Least-recently-used key should be evicted."
+    assert cache.get_metrics()["evictions"] == 1
+
+def test_session_cache_sweeps_expired_head():
+    cache = SessionCache(max_size=3, ttl=1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    time.sleep(1.1)
+    assert cache.get("c") is None
+    assert cache.get_metrics()["expirations"] == 2, "SessionCache: Expired keys should be swept on access."
+    assert len(cache.shards[0].cache) == 0
@@ -1,15 +1,18 @@
+import os
 import numpy as np
 import pytest
-from semantic_cache import config
+from semantic_cache import config, vector_store
 from semantic_cache.vector_store import VectorStore
 
+_RNG = np.random.default_rng(0)
+
 def create_random_vector(dim):
-    return np.random.rand(dim).astype("float32")
+    return _RNG.standard_normal(dim, dtype=np.float32)
 
 def test_vector_store_add_search_delete():
     vs = VectorStore(use_subprocess=False)
     key = "test_key"
-    vector = create_random_vector(config.VECTOR_DIM)
+    vector = create_random_vector(vs.dim)
     
     # Test adding the vector
     vs.add(key, vector)
@@ -26,7 +29,7 @@ def test_vector_store_add_search_delete():
 def test_vector_store_reset_index():
     vs = VectorStore(use_subprocess=False)
     key = "test_key"
-    vector = create_random_vector(config.VECTOR_DIM)
+    vector = create_random_vector(vs.dim)
     vs.add(key, vector)
     # Ensure vector exists before reset
     results = vs.search(vector, top_k=1)
@@ -36,3 +39,173 @@ def test_vector_store_reset_index():
     vs.reset_index()
     results_after_reset = vs.search(vector, top_k=1)
     assert len(results_after_reset) == 0, "VectorStore: No vectors should be found after reset."
+
+@pytest.mark.parametrize("index_factory", ["IVF4,Flat", "HNSW32,SQfp16"])
+def test_vector_store_trains_ann_index(index_factory):
+    vs = VectorStore(use_subprocess=False, index_factory=index_factory, min_train_size=64)
+    vectors = _RNG.standard_normal((100, vs.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for i, vector in enumerate(vectors):
+        vs.add(f"key_{i}", vector)
+    assert vs.is_trained, "VectorStore: Index should be trained once min_train_size is reached."
+
+    found_key, _ = vs.search(vectors[42], top_k=1)[0]
+    assert found_key == "key_42", "VectorStore: Trained index should return the matching key."
+    vs.delete("key_3")
+    vs.add("key_7", vectors[7])
+    assert all(vs.search(vectors[i], top_k=1)[0][0] == f"key_{i}" for i in range(100) if i != 3), \
+        "VectorStore: Deletes and re-adds should not remap other keys."
+
+def test_vector_store_save_load(tmp_path):
+    path = str(tmp_path / "index.faiss")
+    vs = VectorStore(use_subprocess=False)
+    vector = create_random_vector(vs.dim)
+    vs.add("kept", vector)
+    vs.add("deleted", create_random_vector(vs.dim))
+    vs.delete("deleted")
+    vs.save(path)
+
+    restored = VectorStore(use_subprocess=False, index_path=path)
+    assert len(restored) == 1, "VectorStore: Reloaded store should contain the saved keys."
+    found_key, _ = restored.search(vector, top_k=1)[0]
+    assert found_key == "kept", "VectorStore: Reloaded index should return the saved key."
+
+    mismatched = VectorStore(use_subprocess=False, dim=vs.dim // 2, index_path=path)
+    assert len(mismatched) == 0, "VectorStore: Index saved with another dimension should not load."
+
+    # A save interrupted between its two renames leaves a new index beside the old meta.
+    stale_meta = open(path + ".meta", "rb").read()
+    vs.add("later", create_random_vector(vs.dim))
+    vs.save(path)
+    with open(path + ".meta", "wb") as f:
+        f.write(stale_meta)
+    assert len(VectorStore(index_path=path)) == 0, "VectorStore: Mismatched meta should not load."
+    os.remove(path + ".meta")
+    assert len(VectorStore(index_path=path)) == 0, "VectorStore: A missing meta should not load."
+
+def test_vector_store_subprocess_worker_keeps_state():
+    vs = VectorStore(use_subprocess=True)
+    try:
+        vector = create_random_vector(vs.dim)
+        vs.add("test_key", vector)
+        assert len(vs) == 1 and "test_key" in vs, "VectorStore: Worker should keep vectors across calls."
+        found_key, _ = vs.search(vector, top_k=1)[0]
+        assert found_key == "test_key", "VectorStore: Worker search should return the added key."
+        vs.delete("test_key")
+        assert vs.search(vector, top_k=1) == [], "VectorStore: No results should be found after deletion."
+    finally:
+        vs.close()
+
+def test_vector_store_add_vectors():
+    vs = VectorStore()
+    vs.reset_index()
+    vectors = np.stack([create_random_vector(vs.dim) for _ in range(5)])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    keys = [f"bulk_{i}" for i in range(5)]
+    vs.add_vectors(keys, vectors)
+    assert len(vs) == 5
+    results = vs.search(vectors[3], top_k=1)
+    assert results[0][0] == "bulk_3"
+
+def test_vector_store_hnsw_rebuilds_after_deletes():
+    vs = VectorStore(index_factory="HNSW32,Flat", min_train_size=20)
+    vectors = np.stack([create_random_vector(vs.dim) for _ in range(20)])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vs.add_vectors([f"key_{i}" for i in range(20)], vectors)
+    # HNSW cannot remove vectors; the deleted vector stays as a tombstone that
+    # search fetches past.
+    vs.delete("key_0")
+    assert vs.search(vectors[0], top_k=1)[0][0] != "key_0"
+    # Deleting a fifth of them triggers a rebuild.
+    for i in range(1, 5):
+        vs.delete(f"key_{i}")
+    assert vs.index.ntotal == 15
+    assert vs.search(vectors[0], top_k=1)[0][0] != "key_0"
+    assert vs.search(vectors[10], top_k=1)[0][0] == "key_10"
+
+def test_vector_store_normalizes_vectors():
+    vs = VectorStore()
+    vector = create_random_vector(vs.dim)
+    vs.add("scaled", vector * 10)
+    _, similarity = vs.search(vector, top_k=1)[0]
+    assert np.isclose(similarity, 1.0, atol=1e-3), "VectorStore: Scores should be cosine similarities."
+
+def test_vector_store_delete_many():
+    vs = VectorStore()
+    for i in range(5):
+        vs.add(f"key_{i}", create_random_vector(vs.dim))
+    vs.delete_many(["key_0", "key_2", "missing"])
+    assert len(vs) == 3
+    assert "key_2" not in vs and "key_1" in vs
+    assert vs.index.ntotal == 3
+
+def test_vector_store_reserve():
+    vs = VectorStore()
+    vs.reserve(100)
+    vector = create_random_vector(vs.dim)
+    vs.add("reserved", vector)
+    assert vs.search(vector, top_k=1)[0][0] == "reserved"
+    assert vs.index.ntotal == 1
+
+def test_vector_store_binary_quantizer():
+    vs = VectorStore(quantizer="bbq", min_train_size=50)
+    vectors = np.stack([create_random_vector(vs.dim) for _ in range(50)])
+    vs.add_vectors([f"key_{i}" for i in range(50)], vectors)
+    assert vs.is_trained
+    found_key, similarity = vs.search(vectors[7], top_k=1)[0]
+    assert found_key == "key_7"
+    assert np.isclose(similarity, 1.0)
+
+def test_vector_store_search_batch():
+    vs = VectorStore()
+    vectors = np.stack([create_random_vector(vs.dim) for _ in range(3)])
+    vs.add_vectors(["a", "b", "c"], vectors)
+    results = vs.search_batch(vectors[[2, 0]], top_k=1)
+    assert [hits[0][0] for hits in results] == ["c", "a"]
+    with pytest.raises(ValueError):
+        vs.search(vectors[:2])
+
+def test_vector_store_hnswlib_backend(tmp_path):
+    pytest.importorskip("hnswlib")
+    vs = VectorStore(backend="hnswlib", min_train_size=20)
+    vectors = np.stack([create_random_vector(vs.dim) for _ in range(30)])
+    vs.add_vectors([f"key_{i}" for i in range(30)], vectors)
+    assert vs.is_trained
+    vs.delete("key_3")
+    assert vs.search(vectors[5], top_k=1)[0][0] == "key_5"
+    assert all(key != "key_3" for key, _ in vs.search(vectors[3], top_k=5))
+
+    path = str(tmp_path / "index.hnsw")
+    vs.save(path)
+    restored = VectorStore(backend="hnswlib", index_path=path)
+    assert restored.search(vectors[5], top_k=1)[0][0] == "key_5"
+
+@pytest.mark.parametrize("codec", ["Flat", "SQ8"])
+def test_vector_store_ivf_backend(monkeypatch, codec):
+    faiss = pytest.importorskip("faiss")
+    monkeypatch.setattr(config, "IVF_CODEC", codec)
+    vs = VectorStore(backend="ivf", min_train_size=400)
+    vectors = _RNG.standard_normal((400, vs.dim), dtype=np.float32)
+    vs.add_vectors([f"key_{i}" for i in range(400)], vectors)
+    assert faiss.extract_index_ivf(vs.base_index).nlist == 40
+    assert vs.search(vectors[9], top_k=1)[0][0] == "key_9"
+    # Deleting and re-adding must not shift which key the remaining IDs map to.
+    vs.delete("key_3")
+    vs.add("key_7", vectors[7])
+    assert all(vs.search(vectors[i], top_k=1)[0][0] == f"key_{i}" for i in range(400) if i != 3)
+
+def test_vector_store_numpy_fallback(monkeypatch, tmp_path):
+    monkeypatch.setattr(vector_store, "faiss", None)
+    vs = VectorStore()
+    vectors = _RNG.standard_normal((50, vs.dim), dtype=np.float32)
+    vs.add_vectors([f"key_{i}" for i in range(50)], vectors)
+    vs.delete("key_3")
+    results = vs.search(vectors[5], top_k=3)
+    assert results[0][0] == "key_5" and abs(results[0][1] - 1.0) < 1e-5
+    assert all(key != "key_3" for key, _ in vs.search(vectors[3], top_k=5))
+    assert vs.search(vectors[49], top_k=1)[0][0] == "key_49"  # Moved into key_3's row.
+
+    path = str(tmp_path / "index.npy")
+    vs.save(path)
+    restored = VectorStore(index_path=path)
+    assert restored.search(vectors[7], top_k=1)[0][0] == "key_7"